@@ -2,8 +2,7 @@ from __future__ import annotations
 import os
 import time
 from dataclasses import dataclass, field, asdict
-from typing import Any, Dict, List
-import yaml
+from typing import Any, Dict, FrozenSet, List, Optional, Union
 
 POLICY_PATH = os.path.join(os.path.dirname(__file__), "..", "configs", "policy", "PLANNER_POLICY.yaml")
 
@@ -26,26 +25,71 @@ class Plan:
     rubric: Dict[str, Any]
 
 
+@dataclass(frozen=True)
+class RolePolicy:
+    allowed_tools: FrozenSet[str]
+    max_steps: int
+    budgets: Dict[str, int]
+
+
+@dataclass(frozen=True)
+class CompiledPolicy:
+    raw: Dict[str, Any]
+    roles: Dict[str, RolePolicy]
+    risk_matrix: Dict[str, str]
+    mtime_ns: int = 0
+
+    def role(self, name: str) -> RolePolicy:
+        return self.roles.get(name, self.roles["user"])
+
+
+_compiled_policy: Optional[CompiledPolicy] = None
+
+
 def load_policy() -> Dict[str, Any]:
+    import yaml
+
     with open(POLICY_PATH, "r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
 
-def clamp_to_policy(plan: Plan, policy: Dict[str, Any]) -> Plan:
-    role_caps = policy["roles"].get(plan.role, policy["roles"]["user"])
+def compile_policy(policy: Dict[str, Any], mtime_ns: int = 0) -> CompiledPolicy:
+    roles = {
+        name: RolePolicy(
+            allowed_tools=frozenset(caps["allowed_tools"]),
+            max_steps=caps["max_steps"],
+            budgets={
+                "max_steps": caps["max_steps"],
+                "max_budget_tokens": caps["max_budget_tokens"],
+                "max_wallclock_seconds": caps["max_wallclock_seconds"],
+            },
+        )
+        for name, caps in policy["roles"].items()
+    }
+    return CompiledPolicy(raw=policy, roles=roles, risk_matrix=policy.get("risk_matrix", {}), mtime_ns=mtime_ns)
+
+
+def get_policy() -> CompiledPolicy:
+    # Compiled once and reused until PLANNER_POLICY.yaml changes on disk
+    global _compiled_policy
+    mtime_ns = os.stat(POLICY_PATH).st_mtime_ns
+    if _compiled_policy is None or _compiled_policy.mtime_ns != mtime_ns:
+        _compiled_policy = compile_policy(load_policy(), mtime_ns)
+    return _compiled_policy
+
+
+def clamp_to_policy(plan: Plan, policy: Union[CompiledPolicy, Dict[str, Any]]) -> Plan:
+    if not isinstance(policy, CompiledPolicy):
+        policy = compile_policy(policy)
+    role_caps = policy.role(plan.role)
     # Filter tools by allow-list
-    allowed = set(role_caps["allowed_tools"])
-    filtered_steps = [s for s in plan.steps if s.tool in allowed]
+    filtered_steps = [s for s in plan.steps if s.tool in role_caps.allowed_tools]
     # Enforce max steps
-    if len(filtered_steps) > role_caps["max_steps"]:
-        filtered_steps = filtered_steps[: role_caps["max_steps"]]
+    if len(filtered_steps) > role_caps.max_steps:
+        filtered_steps = filtered_steps[: role_caps.max_steps]
     plan.steps = filtered_steps
     # Budgets
-    plan.budgets = {
-        "max_steps": role_caps["max_steps"],
-        "max_budget_tokens": role_caps["max_budget_tokens"],
-        "max_wallclock_seconds": role_caps["max_wallclock_seconds"],
-    }
+    plan.budgets = dict(role_caps.budgets)
     return plan
 
 
@@ -56,12 +100,12 @@ def build_plan(messages: List[Dict[str, str]], role: str = "user") -> Plan:
     steps = [
         PlanStep(tool="rag.retrieve", params={"query": goal, "top_k": 5}, expected_evidence=["matches>=3"]),
     ]
-    policy = load_policy()
+    policy = get_policy()
     plan = Plan(
         goal=goal,
         steps=steps,
         stop_conditions=["evidence_sufficient", "budget_exhausted", "no_more_actions"],
-        risks=policy.get("risk_matrix", {}),
+        risks=dict(policy.risk_matrix),
         budgets={},
         role=role,
         rubric={
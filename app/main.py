@@ -26,7 +26,8 @@ class ToolStatus(BaseModel):
 class HostState:
     def __init__(self) -> None:
         self.tools: Dict[str, ToolStatus] = {}
-        self.client = httpx.AsyncClient(timeout=REQUEST_TIMEOUT)
+        # Created on startup; building the client (SSL context) is kept off import
+        self.client: Optional[httpx.AsyncClient] = None
 
     def register(self, name: str, url: str) -> None:
         self.tools[name] = ToolStatus(name=name, url=url, healthy=False, last_checked=0.0)
@@ -65,6 +66,7 @@ class ChatRequest(BaseModel):
 
 @app.on_event("startup")
 async def on_startup():
+    host.client = httpx.AsyncClient(timeout=REQUEST_TIMEOUT)
     # Auto-register tools from MCP_SERVERS; map basic names to URLs.
     # Expect env like: MCP_REGISTRY_JSON='{"rag.retrieve":"http://localhost:7001","papers.search":"http://localhost:7002","papers.fetch":"http://localhost:7002","notes.read":"http://localhost:7003","notes.write":"http://localhost:7003","db.query":"http://localhost:7004"}'
     registry_json = os.getenv("MCP_REGISTRY_JSON")
@@ -91,6 +93,11 @@ async def on_shutdown():
     await host.client.aclose()
 
 
+@app.get("/health")
+async def health():
+    return {"ok": True, "stage": os.getenv("APP_STAGE", "local")}
+
+
 @app.get("/tools")
 async def list_tools() -> List[ToolStatus]:
     return list(host.tools.values())
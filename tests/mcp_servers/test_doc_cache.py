@@ -0,0 +1,95 @@
+import random
+import string
+
+from tools.mcp_servers.doc_cache import DocCache, content_hash
+
+PAGES = ["héllo", "", "world\f"]
+FULL = "héllo\f\fworld\f"
+
+
+def _text(seed: int, n: int = 200) -> str:
+    # Random letters compress to roughly 60%, so stored sizes are predictable
+    rnd = random.Random(seed)
+    return "".join(rnd.choice(string.ascii_letters) for _ in range(n))
+
+
+def test_page_ranges(tmp_path):
+    cache = DocCache(str(tmp_path))
+    doc = cache.put("a", PAGES, {"title": "A"})
+    assert doc.pages == 3 and doc.raw_size == len(FULL.encode("utf-8"))
+    assert cache.read_pages(doc) == FULL
+    assert cache.read_pages(doc, 1, 1) == "héllo"
+    assert cache.read_pages(doc, 2, 2) == ""
+    # A form feed on the last page is content, not a separator
+    assert cache.read_pages(doc, 3, 3) == "world\f"
+    assert cache.read_pages(doc, 1, 2) == "héllo\f"
+    assert cache.read_pages(doc, 2, 99) == "\fworld\f"
+    assert cache.read_pages(doc, 3, 2) == ""
+
+
+def test_byte_ranges(tmp_path):
+    cache = DocCache(str(tmp_path))
+    doc = cache.put("a", PAGES, {})
+    raw = FULL.encode("utf-8")
+    assert cache.read_bytes(doc) == FULL
+    assert cache.read_bytes(doc, 0, 1) == "h"
+    # Cuts through "é" (2 bytes) drop the partial character
+    assert cache.read_bytes(doc, 0, 2) == "h"
+    assert cache.read_bytes(doc, 3, 8) == raw[3:8].decode("utf-8")
+    assert cache.read_bytes(doc, 6, 8) == "\f\f"
+    assert cache.read_bytes(doc, 7, 9) == "\fw"
+    assert cache.read_bytes(doc, len(raw) - 1, 10**9) == "\f"
+    assert cache.read_bytes(doc, 5, 5) == ""
+    assert cache.read_bytes(doc, len(raw), None) == ""
+
+
+def test_page_layout_is_hashed(tmp_path):
+    assert content_hash(["a", "b"]) != content_hash(["a\fb"])
+    assert content_hash([]) != content_hash([""])
+    cache = DocCache(str(tmp_path))
+    one, two = cache.put("one", ["a", "b"], {"n": 1}), cache.put("two", ["a", "b"], {"n": 2})
+    assert one.content_hash == two.content_hash
+    assert cache.get("one").metadata == {"n": 1}
+    assert cache.get("two").metadata == {"n": 2}
+
+
+def test_get_after_reopen(tmp_path):
+    cache = DocCache(str(tmp_path))
+    cache.put("a", PAGES, {"title": "A"})
+    cache.close()
+    doc = DocCache(str(tmp_path)).get("a")
+    assert doc.metadata == {"title": "A"}
+    assert doc.pages == 3
+
+
+def test_lru_eviction(tmp_path):
+    cache = DocCache(str(tmp_path), max_bytes=400)
+    cache.put("x", [_text(1)], {})
+    cache.put("y", [_text(2)], {})
+    cache.get("x")
+    cache.put("z", [_text(3)], {})
+    assert cache.get("y") is None
+    assert cache.get("x") is not None
+    assert cache.get("z") is not None
+
+
+def test_lfu_eviction(tmp_path):
+    cache = DocCache(str(tmp_path), max_bytes=400, policy="lfu")
+    cache.put("x", [_text(1)], {})
+    cache.put("y", [_text(2)], {})
+    cache.get("x")
+    cache.get("y")
+    cache.get("y")
+    cache.put("z", [_text(3)], {})
+    assert cache.get("x") is None
+    assert cache.get("y") is not None
+
+
+def test_read_after_concurrent_eviction(tmp_path):
+    cache = DocCache(str(tmp_path), max_bytes=200)
+    cache.put("x", [_text(1)], {})
+    doc = cache.get("x")
+    cache.put("y", [_text(2)], {})
+    assert cache.get("x") is None
+    assert cache.read_pages(doc) == _text(1)
+    doc.close()
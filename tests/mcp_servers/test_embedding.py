@@ -0,0 +1,111 @@
+import os
+import time
+import asyncio
+from array import array
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from tools.mcp_servers import embedding
+from tools.mcp_servers.embedding import EmbeddingService, HashingEmbedder, chunk_text
+
+
+class FlakyEmbedder(HashingEmbedder):
+    # "crash" kills the worker process; "slow" holds the worker for a while.
+    def embed_into(self, texts, out):
+        if "crash" in texts:
+            os._exit(1)
+        if "slow" in texts:
+            time.sleep(0.5)
+        super().embed_into(texts, out)
+
+
+def _direct(embedder, text):
+    out = array("f", [0.0] * embedder.dim)
+    embedder.embed_into([text], memoryview(out))
+    return out.tolist()
+
+
+def test_embed_batches_match_direct():
+    async def run():
+        embedder = HashingEmbedder(dim=16)
+        service = EmbeddingService(embedder, workers=1, max_batch_size=4, max_wait_ms=50)
+        sizes = []
+        dispatch = service._dispatch
+
+        async def recording(batch):
+            sizes.append(len(batch))
+            await dispatch(batch)
+
+        service._dispatch = recording
+        await service.start()
+        try:
+            texts = [f"text number {i}" for i in range(10)]
+            results = await service.embed(texts)
+        finally:
+            await service.stop()
+        assert sizes == [4, 4, 2]
+        for text, result in zip(texts, results):
+            assert result.vector.tolist() == pytest.approx(_direct(embedder, text))
+
+    asyncio.run(run())
+
+
+def test_stop_fails_pending_texts():
+    async def run():
+        service = EmbeddingService(FlakyEmbedder(dim=8), workers=1, max_batch_size=2, max_wait_ms=1)
+        await service.start()
+        pending = asyncio.ensure_future(service.embed(["slow", "a"] + [f"t{i}" for i in range(10)]))
+        await asyncio.sleep(0.2)
+        await service.stop()
+        with pytest.raises(RuntimeError, match="EmbeddingService stopped"):
+            await pending
+        with pytest.raises(RuntimeError, match="not started"):
+            await service.embed(["again"])
+
+    asyncio.run(run())
+
+
+def test_recovers_from_broken_pool():
+    async def run():
+        service = EmbeddingService(FlakyEmbedder(dim=8), workers=1, max_batch_size=1, max_wait_ms=0)
+        await service.start()
+        try:
+            with pytest.raises(BrokenProcessPool):
+                await service.embed(["crash"])
+            assert len(await service.embed(["a", "b"])) == 2
+        finally:
+            await service.stop()
+
+    asyncio.run(run())
+
+
+def test_allocation_failure_fails_batch(monkeypatch):
+    async def run():
+        service = EmbeddingService(HashingEmbedder(dim=8), workers=1, max_batch_size=1, max_wait_ms=0)
+        await service.start()
+        real = embedding.shared_memory.SharedMemory
+        calls = []
+
+        def failing(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 1:
+                raise OSError(28, "No space left on device")
+            return real(*args, **kwargs)
+
+        monkeypatch.setattr(embedding.shared_memory, "SharedMemory", failing)
+        try:
+            with pytest.raises(OSError):
+                await asyncio.wait_for(service.embed(["a"]), 5)
+            # The in-flight slot was released, so the next batch still runs
+            assert len(await asyncio.wait_for(service.embed(["b"]), 5)) == 1
+        finally:
+            await service.stop()
+
+    asyncio.run(run())
+
+
+def test_chunk_text_packs_paragraphs():
+    assert chunk_text("a\n\nb\n\n\n\nc", max_chars=4) == ["a\n\nb", "c"]
+    assert chunk_text("x" * 5, max_chars=2) == ["xx", "xx", "x"]
+    assert chunk_text(" \n\n ") == []
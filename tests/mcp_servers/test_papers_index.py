@@ -0,0 +1,74 @@
+import random
+
+from tools.bench_papers_index import planted_titles, synthetic_records, typo
+from tools.mcp_servers import papers_index
+from tools.mcp_servers.papers_index import PapersIndex, build_index, trigrams
+
+EXACT_TITLE = "Graph Transformer Survey"
+
+
+def _records(n: int):
+    # Many near-duplicates first, so the exact title lands at the highest row id.
+    for i in range(n):
+        yield {"title": f"Graph transformer survey of method {i}", "year": 2020, "source": "arxiv"}
+    yield {"title": EXACT_TITLE, "year": 2024, "source": "arxiv", "arxiv_id": "2401.00001"}
+
+
+def _index(tmp_path, n: int = 3000) -> PapersIndex:
+    build_index(_records(n), str(tmp_path), workers=1)
+    return PapersIndex(str(tmp_path))
+
+
+def test_exact_title_at_high_row_id(tmp_path):
+    items = _index(tmp_path).search("graph transformer survey", max_results=3)
+    assert items[0]["title"] == EXACT_TITLE
+    assert items[0]["score"] == 1.0
+
+
+def test_exact_title_with_tight_budgets(tmp_path, monkeypatch):
+    # Every posting list is over budget; the exact title's bucket is visited first.
+    monkeypatch.setattr(papers_index, "MAX_POSTINGS", 100)
+    monkeypatch.setattr(papers_index, "MAX_CANDIDATES", 20)
+    items = _index(tmp_path).search("graph transformer survey", max_results=3)
+    assert items[0]["title"] == EXACT_TITLE
+    assert items[0]["score"] == 1.0
+
+
+def test_typo_query_finds_title(tmp_path):
+    items = _index(tmp_path).search("grpah transfromer survey", max_results=3)
+    assert items[0]["title"] == EXACT_TITLE
+
+
+def test_id_lookup(tmp_path):
+    items = _index(tmp_path).search("arXiv:2401.00001v2")
+    assert [i["title"] for i in items] == [EXACT_TITLE]
+    assert items[0]["url"] == "https://arxiv.org/abs/2401.00001"
+
+
+def test_matches_brute_force_across_runs(tmp_path, monkeypatch):
+    # Several build runs merged by two workers; with budgets out of the way, search is exact.
+    rnd = random.Random(7)
+    words = "graph neural network deep learning survey transformer the of a diffusion sparse x ab".split()
+    titles = [" ".join(rnd.choice(words) for _ in range(rnd.randint(1, 8))) for _ in range(4000)]
+    build_index(({"title": t, "source": "arxiv"} for t in titles), str(tmp_path), workers=2, chunk_rows=700)
+    monkeypatch.setattr(papers_index, "MAX_POSTINGS", 10**9)
+    monkeypatch.setattr(papers_index, "MAX_CANDIDATES", 10**9)
+    index = PapersIndex(str(tmp_path))
+    rows = [set(trigrams(t)) for t in titles]
+    for query in titles[:40] + ["grpah nerual", "the", "ab"]:
+        q = set(trigrams(query))
+        required = max(1, int(len(q) * 0.5 + 0.5))
+        expected = sorted((-len(q & r) / len(q | r), i) for i, r in enumerate(rows) if len(q & r) >= required)[:5]
+        items = index.search(query, 5)
+        assert [i["score"] for i in items] == [round(-s, 4) for s, _ in expected]
+        assert [i["title"] for i in items] == [titles[i] for _, i in expected]
+
+
+def test_planted_titles_at_scale(tmp_path):
+    planted = planted_titles(20)
+    build_index(synthetic_records(60000, planted), str(tmp_path), workers=2, chunk_rows=15000)
+    index = PapersIndex(str(tmp_path))
+    rnd = random.Random(3)
+    for title in planted:
+        assert index.search(title, 10)[0]["title"] == title
+        assert index.search(typo(title, rnd), 10)[0]["title"] == title
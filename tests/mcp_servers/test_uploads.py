@@ -0,0 +1,75 @@
+import os
+import time
+import asyncio
+import hashlib
+
+import pytest
+from fastapi import HTTPException
+
+from tools.mcp_servers.uploads import UploadStore, doc_id_for
+
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+
+def test_resumable_upload(tmp_path):
+    async def run():
+        store = UploadStore(str(tmp_path))
+        state = store.create("paper.pdf", 10)
+        await store.append(state.upload_id, 0, _chunks(b"hello", b"wor"))
+        # A restart loses the running hash; it is rebuilt from the partial file
+        store = UploadStore(str(tmp_path))
+        with pytest.raises(HTTPException) as e:
+            await store.append(state.upload_id, 0, _chunks(b"ld"))
+        assert e.value.status_code == 409
+        await store.append(state.upload_id, 8, _chunks(b"ld"))
+        result = await store.complete(state.upload_id)
+        digest = hashlib.sha256(b"helloworld").hexdigest()
+        assert result == {"doc_id": doc_id_for(digest), "sha256": digest, "size": 10, "deduplicated": False}
+        assert store._locks == {} and store._hashers == {}
+
+    asyncio.run(run())
+
+
+def test_unknown_ids_leave_no_state(tmp_path):
+    async def run():
+        store = UploadStore(str(tmp_path))
+        for upload_id in ["../etc", "0" * 32]:
+            with pytest.raises(HTTPException):
+                await store.append(upload_id, 0, _chunks(b"x"))
+            with pytest.raises(HTTPException):
+                await store.complete(upload_id)
+        assert store._locks == {}
+
+    asyncio.run(run())
+
+
+def test_put_bytes_deduplicates(tmp_path):
+    store = UploadStore(str(tmp_path))
+    first = store.put_bytes("a.pdf", b"same")
+    second = store.put_bytes("b.pdf", b"same")
+    assert first["doc_id"] == second["doc_id"]
+    assert (first["deduplicated"], second["deduplicated"]) == (False, True)
+
+
+def test_reap_abandoned_uploads(tmp_path):
+    async def run():
+        store = UploadStore(str(tmp_path), ttl=60)
+        old, fresh = store.create("old.pdf"), store.create("fresh.pdf")
+        await store.append(old.upload_id, 0, _chunks(b"abc"))
+        stray = store._partial / "deadbeef.b64"
+        stray.write_bytes(b"x")
+        past = time.time() - 120
+        for path in (store._partial / old.upload_id, stray):
+            os.utime(path, (past, past))
+        assert await store.reap() == [old.upload_id]
+        assert not stray.exists()
+        assert old.upload_id not in store._hashers and old.upload_id not in store._locks
+        with pytest.raises(HTTPException) as e:
+            store.status(old.upload_id)
+        assert e.value.status_code == 404
+        assert store.status(fresh.upload_id).offset == 0
+
+    asyncio.run(run())
@@ -0,0 +1,128 @@
+import sys
+import json
+import time
+import random
+import string
+import argparse
+import resource
+import tempfile
+import statistics
+from itertools import accumulate
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from tools.mcp_servers import papers_index  # noqa: E402
+
+# Build and query benchmark for the offline papers.search index on synthetic titles.
+#
+# Titles draw 5-14 words from a Zipf-distributed vocabulary (a few real words at
+# the top ranks, so common-word queries hit long posting lists). Planted titles
+# are spread over the row range, including the last row; each is queried
+# verbatim and with two transposed letters, and recall of the planted row at
+# rank 1 is reported alongside p50/p95/max latency per query kind.
+#
+# Usage: `python tools/bench_papers_index.py [--rows 1000000] [--workers 8] [--json]`
+
+COMMON_WORDS = (
+    "the of a for and in on with learning deep neural networks graph models language large "
+    "diffusion transformer survey retrieval generation data robust efficient"
+).split()
+COMMON_QUERIES = ["the", "neural", "deep learning", "graph neural networks", "large language models"]
+
+
+def _vocabulary(rnd: random.Random, size: int) -> List[str]:
+    letters = string.ascii_lowercase
+    return COMMON_WORDS + ["".join(rnd.choice(letters) for _ in range(rnd.randint(3, 11))) for _ in range(size)]
+
+
+def synthetic_records(rows: int, planted: List[str], seed: int = 1) -> Iterator[Dict[str, Any]]:
+    # `rows` random titles with `planted` titles spread evenly, the last one at the final row
+    rnd = random.Random(seed)
+    vocab = _vocabulary(rnd, 50000)
+    cum = list(accumulate(1 / (i + 1) ** 1.05 for i in range(len(vocab))))
+    every = max(rows // max(len(planted), 1), 1)
+    for row in range(rows):
+        k = (row + 1) // every - 1
+        if (row + 1) % every == 0 and k < len(planted):
+            title = planted[k]
+        else:
+            title = " ".join(rnd.choices(vocab, cum_weights=cum, k=rnd.randint(5, 14)))
+        yield {"title": title, "authors": "", "year": 2000 + row % 25, "source": "arxiv", "arxiv_id": f"{row:010d}"}
+
+
+def planted_titles(count: int, seed: int = 2) -> List[str]:
+    rnd = random.Random(seed)
+    vocab = _vocabulary(rnd, 2000)
+    return [" ".join(rnd.choice(vocab) for _ in range(rnd.randint(3, 10))) for _ in range(count)]
+
+
+def typo(title: str, rnd: random.Random) -> str:
+    chars = list(title)
+    for _ in range(2):
+        i = rnd.randrange(len(chars) - 1)
+        chars[i], chars[i + 1] = chars[i + 1], chars[i]
+    return "".join(chars)
+
+
+def _latency(times: List[float]) -> Dict[str, float]:
+    times = sorted(times)
+    return {
+        "p50_ms": round(statistics.median(times) * 1000, 2),
+        "p95_ms": round(times[int(0.95 * (len(times) - 1))] * 1000, 2),
+        "max_ms": round(times[-1] * 1000, 2),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark papers.search index build and query latency")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--planted", type=int, default=50, help="planted titles to look up")
+    parser.add_argument("--workers", type=int, help="build processes (default CPU count)")
+    parser.add_argument("--out", help="index directory (default: a temporary directory)")
+    parser.add_argument("--json", action="store_true", help="emit results as JSON")
+    args = parser.parse_args()
+
+    out = args.out or tempfile.mkdtemp(prefix="papers_index_")
+    planted = planted_titles(args.planted)
+    start = time.perf_counter()
+    papers_index.build_index(synthetic_records(args.rows, planted), out, workers=args.workers)
+    build_s = time.perf_counter() - start
+    rss_mb = max(resource.getrusage(who).ru_maxrss for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)) / 1024
+
+    index = papers_index.PapersIndex(out)
+    index.search("warm up")
+    rnd = random.Random(3)
+    results: Dict[str, Any] = {"rows": args.rows, "build_s": round(build_s, 1), "build_max_rss_mb": round(rss_mb)}
+    kinds = {
+        "exact": [(t, t) for t in planted],
+        "typo": [(typo(t, rnd), t) for t in planted],
+        "common": [(q, None) for q in COMMON_QUERIES],
+    }
+    for kind, queries in kinds.items():
+        times, hits = [], 0
+        for query, expected in queries:
+            t = time.perf_counter()
+            items = index.search(query, 10)
+            times.append(time.perf_counter() - t)
+            hits += bool(items) and expected is not None and items[0]["title"] == expected
+        results[kind] = _latency(times)
+        if kind != "common":
+            results[kind]["recall_at_1"] = round(hits / len(queries), 3)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"rows {args.rows}: build {results['build_s']} s, max RSS {results['build_max_rss_mb']} MiB")
+        print(f"{'queries':<8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'max (ms)':>9} {'recall@1':>9}")
+        for kind in kinds:
+            r = results[kind]
+            recall = f"{r['recall_at_1']:.3f}" if "recall_at_1" in r else "-"
+            print(f"{kind:<8} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['max_ms']:>9.2f} {recall:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
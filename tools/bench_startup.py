@@ -0,0 +1,125 @@
+import sys
+import json
+import time
+import socket
+import argparse
+import statistics
+import subprocess
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Cold-start benchmark for the gateway and MCP servers.
+#
+# For each target, measures in fresh interpreters:
+# - import: wall time to import the app module (python -X importtime is
+#   printed with --importtime for a per-module breakdown)
+# - health: wall time from spawning uvicorn to the first `GET /health` with ok=true
+#
+# Usage: `python tools/bench_startup.py [--runs 5] [--only rag papers] [--json]`
+
+ROOT = Path(__file__).resolve().parents[1]
+
+TARGETS: Dict[str, str] = {
+    "gateway": "app.main:app",
+    "rag": "tools.mcp_servers.rag_server:app",
+    "papers": "tools.mcp_servers.papers_server:app",
+    "notes": "tools.mcp_servers.notes_server:app",
+    "db": "tools.mcp_servers.db_server:app",
+    "ingest": "tools.mcp_servers.ingest_server:app",
+}
+
+IMPORT_SNIPPET = "import time, importlib; t = time.perf_counter(); importlib.import_module({module!r}); print(time.perf_counter() - t)"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_import(module: str, importtime: bool = False) -> Optional[float]:
+    args = [sys.executable]
+    if importtime:
+        args += ["-X", "importtime"]
+    args += ["-c", IMPORT_SNIPPET.format(module=module)]
+    try:
+        proc = subprocess.run(args, cwd=ROOT, capture_output=True, text=True, check=True)
+    except subprocess.CalledProcessError as e:
+        # e.g. a missing dependency; report the target as failed instead of aborting the run
+        lines = (e.stderr or "").strip().splitlines()
+        print(f"[FAIL] import {module}: {lines[-1] if lines else e}", file=sys.stderr)
+        return None
+    if importtime:
+        print(proc.stderr, file=sys.stderr)
+    return float(proc.stdout.strip().splitlines()[-1])
+
+
+def measure_health(app_path: str, timeout: float) -> Optional[float]:
+    port = _free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app_path, "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if proc.poll() is not None:
+                return None
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as r:
+                    if r.status == 200 and json.loads(r.read()).get("ok") is True:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.005)
+        return None
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure cold-start import time and time to first /health OK")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for /health per run")
+    parser.add_argument("--only", nargs="*", choices=sorted(TARGETS), help="subset of targets")
+    parser.add_argument("--importtime", action="store_true", help="print -X importtime breakdown for one run")
+    parser.add_argument("--json", action="store_true", help="emit results as JSON")
+    args = parser.parse_args()
+
+    results: Dict[str, Dict[str, Any]] = {}
+    failures = 0
+    for name in args.only or TARGETS:
+        app_path = TARGETS[name]
+        module = app_path.split(":")[0]
+        imports = [measure_import(module, args.importtime and i == 0) for i in range(args.runs)]
+        imported: List[float] = [t for t in imports if t is not None]
+        failures += len(imports) - len(imported)
+        healths = [measure_health(app_path, args.timeout) for _ in range(args.runs)] if imported else []
+        ok = [h for h in healths if h is not None]
+        failures += len(healths) - len(ok)
+        results[name] = {
+            "import_ms": round(statistics.median(imported) * 1000, 1) if imported else None,
+            "import_failures": len(imports) - len(imported),
+            "health_ms": round(statistics.median(ok) * 1000, 1) if ok else None,
+            "health_failures": len(healths) - len(ok),
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'target':<10} {'import (ms)':>12} {'first /health (ms)':>20}")
+        for name, r in results.items():
+            imported = "FAIL" if r["import_ms"] is None else f"{r['import_ms']:.1f}"
+            health = "FAIL" if r["health_ms"] is None else f"{r['health_ms']:.1f}"
+            print(f"{name:<10} {imported:>12} {health:>20}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,10 +3,9 @@ import json
 import asyncio
 from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, Optional
 
 from fastapi import HTTPException
-from jsonschema import Draft202012Validator
 
 CONTRACTS_DIR = Path(__file__).resolve().parents[2] / "configs" / "contracts"
 
@@ -20,9 +19,23 @@ def load_schema(schema_filename: str) -> Dict[str, Any]:
         return json.load(f)
 
 
-def get_validator(schema_filename: str) -> Draft202012Validator:
-    schema = load_schema(schema_filename)
-    return Draft202012Validator(schema)
+class LazyValidator:
+    # Defers the jsonschema import and schema compilation to the first validation,
+    # keeping both off the server import/startup path.
+    def __init__(self, schema_filename: str) -> None:
+        self.schema_filename = schema_filename
+        self._validator = None
+
+    def iter_errors(self, instance: Any) -> Iterator[Any]:
+        if self._validator is None:
+            from jsonschema import Draft202012Validator
+
+            self._validator = Draft202012Validator(load_schema(self.schema_filename))
+        return self._validator.iter_errors(instance)
+
+
+def get_validator(schema_filename: str) -> LazyValidator:
+    return LazyValidator(schema_filename)
 
 
 class ConcurrencyGate:
@@ -0,0 +1,261 @@
+import os
+import json
+import mmap
+import time
+import zlib
+import sqlite3
+import hashlib
+import uuid
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+# Content-addressed document cache for papers.fetch.
+#
+# Each document is stored once per content hash as a blob of independently
+# zlib-compressed page frames. The frame table (uncompressed and compressed
+# offsets per page) lives in a SQLite index, so a page or byte range is served
+# by mmap-ing the blob and inflating only the frames that overlap the request.
+# Full text is the pages joined with form feeds ("\f"). Metadata is kept per
+# doc_id, so documents with identical text share a blob but not metadata.
+#
+# Access stats (last_access, hits) for eviction are buffered in memory and
+# written in batches, so cache hits do not commit a transaction each.
+#
+# get() and put() open the blob under the same lock eviction unlinks under, and
+# reads go through that handle, so a concurrent put evicting the blob cannot
+# break a read that is already in flight.
+
+PAGE_SEPARATOR = "\f"
+SCHEMA_VERSION = 1
+STATS_FLUSH_COUNT = 256
+STATS_FLUSH_SECS = 5.0
+
+
+@dataclass
+class CachedDocument:
+    doc_id: str
+    content_hash: str
+    raw_size: int
+    pages: int
+    metadata: Dict[str, Any]
+    # (raw_offset, raw_len, stored_offset, stored_len) per page frame
+    frames: List[Tuple[int, int, int, int]]
+    blob: Optional[BinaryIO] = field(default=None, repr=False)
+
+    def close(self) -> None:
+        if self.blob is not None:
+            self.blob.close()
+
+
+def content_hash(pages: List[str]) -> str:
+    # Covers the page layout as well as the text: ["a", "b"] and ["a\fb"], or [] and [""], differ.
+    encoded = [page.encode("utf-8") for page in pages]
+    h = hashlib.sha256(f"{len(encoded)}:{','.join(str(len(e)) for e in encoded)}\0".encode("ascii"))
+    for e in encoded:
+        h.update(e)
+    return h.hexdigest()
+
+
+class DocCache:
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        policy: Optional[str] = None,
+    ) -> None:
+        self.root = Path(root or os.getenv("DOC_CACHE_DIR", "./doc_cache")).resolve()
+        self.max_bytes = int(max_bytes if max_bytes is not None else os.getenv("DOC_CACHE_MAX_BYTES", 2 * 1024**3))
+        self.policy = (policy or os.getenv("DOC_CACHE_POLICY", "lru")).lower()
+        if self.policy not in ("lru", "lfu"):
+            raise ValueError(f"Unsupported DOC_CACHE_POLICY: {self.policy}")
+        self._blobs = self.root / "blobs"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Tuple[float, int]] = {}
+        self._last_flush = time.monotonic()
+        self._db = sqlite3.connect(str(self.root / "index.sqlite"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        if self._db.execute("PRAGMA user_version").fetchone()[0] not in (0, SCHEMA_VERSION):
+            raise ValueError(f"Incompatible doc cache at {self.root}")
+        self._blobs.mkdir(parents=True, exist_ok=True)
+        with self._db:
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS blobs (
+                    content_hash TEXT PRIMARY KEY,
+                    raw_size INTEGER NOT NULL,
+                    stored_size INTEGER NOT NULL,
+                    frames_json TEXT NOT NULL,
+                    last_access REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                );
+                """
+            )
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS docs (
+                    doc_id TEXT PRIMARY KEY,
+                    content_hash TEXT NOT NULL REFERENCES blobs(content_hash),
+                    metadata_json TEXT NOT NULL
+                );
+                """
+            )
+            self._db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_stats()
+            self._db.close()
+
+    def _blob_path(self, digest: str) -> Path:
+        return self._blobs / digest[:2] / digest
+
+    def get(self, doc_id: str) -> Optional[CachedDocument]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT b.content_hash, b.raw_size, b.frames_json, d.metadata_json "
+                "FROM docs d JOIN blobs b ON b.content_hash = d.content_hash WHERE d.doc_id=?",
+                (doc_id,),
+            ).fetchone()
+            if not row:
+                return None
+            try:
+                blob = self._blob_path(row[0]).open("rb")
+            except FileNotFoundError:
+                return None
+            _, hits = self._pending.get(row[0], (0.0, 0))
+            self._pending[row[0]] = (time.time(), hits + 1)
+            if len(self._pending) >= STATS_FLUSH_COUNT or time.monotonic() - self._last_flush >= STATS_FLUSH_SECS:
+                self._flush_stats()
+        frames = [tuple(f) for f in json.loads(row[2])]
+        return CachedDocument(
+            doc_id=doc_id,
+            content_hash=row[0],
+            raw_size=row[1],
+            pages=len(frames),
+            metadata=json.loads(row[3]),
+            frames=frames,
+            blob=blob,
+        )
+
+    def _existing_frames(self, digest: str) -> Optional[List[Tuple[int, int, int, int]]]:
+        with self._lock:
+            row = self._db.execute("SELECT frames_json FROM blobs WHERE content_hash=?", (digest,)).fetchone()
+        if row and self._blob_path(digest).exists():
+            return [tuple(f) for f in json.loads(row[0])]
+        return None
+
+    def _flush_stats(self) -> None:
+        # Caller holds self._lock
+        if self._pending:
+            with self._db:
+                self._db.executemany(
+                    "UPDATE blobs SET last_access=MAX(last_access, ?), hits=hits+? WHERE content_hash=?",
+                    [(ts, hits, digest) for digest, (ts, hits) in self._pending.items()],
+                )
+            self._pending.clear()
+        self._last_flush = time.monotonic()
+
+    def put(self, doc_id: str, pages: List[str], metadata: Dict[str, Any]) -> CachedDocument:
+        digest = content_hash(pages)
+        path = self._blob_path(digest)
+        frames = self._existing_frames(digest)
+        tmp: Optional[Path] = None
+        if frames is None:
+            # Compress outside the lock; concurrent puts of the same content race benignly.
+            frames = []
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{digest}.{uuid.uuid4().hex}.tmp")
+            raw_offset = stored_offset = 0
+            with tmp.open("wb") as f:
+                for i, page in enumerate(pages):
+                    raw = (page if i == len(pages) - 1 else page + PAGE_SEPARATOR).encode("utf-8")
+                    packed = zlib.compress(raw, 6)
+                    f.write(packed)
+                    frames.append((raw_offset, len(raw), stored_offset, len(packed)))
+                    raw_offset += len(raw)
+                    stored_offset += len(packed)
+        with self._lock:
+            if tmp is not None:
+                os.replace(tmp, path)
+                with self._db:
+                    self._db.execute(
+                        "REPLACE INTO blobs(content_hash, raw_size, stored_size, frames_json, last_access, hits) "
+                        "VALUES(?,?,?,?,?,0)",
+                        (digest, raw_offset, stored_offset, json.dumps(frames), time.time()),
+                    )
+            try:
+                blob = path.open("rb")
+            except FileNotFoundError:
+                # Evicted since _existing_frames; fall through and write it again
+                blob = None
+            if blob is not None:
+                with self._db:
+                    self._db.execute(
+                        "REPLACE INTO docs(doc_id, content_hash, metadata_json) VALUES(?,?,?)",
+                        (doc_id, digest, json.dumps(metadata)),
+                    )
+                self._evict(keep=digest)
+        if blob is None:
+            return self.put(doc_id, pages, metadata)
+        return CachedDocument(
+            doc_id=doc_id,
+            content_hash=digest,
+            raw_size=frames[-1][0] + frames[-1][1] if frames else 0,
+            pages=len(frames),
+            metadata=metadata,
+            frames=frames,
+            blob=blob,
+        )
+
+    def _evict(self, keep: str) -> None:
+        self._flush_stats()
+        total = self._db.execute("SELECT COALESCE(SUM(stored_size), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        order = "last_access ASC" if self.policy == "lru" else "hits ASC, last_access ASC"
+        victims = self._db.execute(
+            f"SELECT content_hash, stored_size FROM blobs WHERE content_hash != ? ORDER BY {order}", (keep,)
+        ).fetchall()
+        with self._db:
+            for digest, stored_size in victims:
+                if total <= self.max_bytes:
+                    break
+                self._db.execute("DELETE FROM docs WHERE content_hash=?", (digest,))
+                self._db.execute("DELETE FROM blobs WHERE content_hash=?", (digest,))
+                self._blob_path(digest).unlink(missing_ok=True)
+                total -= stored_size
+
+    def _read_frames(self, doc: CachedDocument, first: int, last: int) -> bytes:
+        if not doc.frames or first > last:
+            return b""
+        if doc.blob is None:
+            doc.blob = self._blob_path(doc.content_hash).open("rb")
+        with mmap.mmap(doc.blob.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            out = bytearray()
+            for _, _, stored_offset, stored_len in doc.frames[first : last + 1]:
+                out += zlib.decompress(mm[stored_offset : stored_offset + stored_len])
+            return bytes(out)
+
+    def read_pages(self, doc: CachedDocument, start: int = 1, end: Optional[int] = None) -> str:
+        # 1-based, inclusive page range
+        first = max(start, 1) - 1
+        last = min(end if end is not None else doc.pages, doc.pages) - 1
+        text = self._read_frames(doc, first, last).decode("utf-8")
+        # Every frame but the last ends with the separator; a "\f" on the last page is content.
+        return text[:-1] if first <= last < doc.pages - 1 else text
+
+    def read_bytes(self, doc: CachedDocument, start: int = 0, end: Optional[int] = None) -> str:
+        # Half-open [start, end) over the UTF-8 encoded full text
+        end = doc.raw_size if end is None else min(end, doc.raw_size)
+        start = max(start, 0)
+        if start >= end:
+            return ""
+        first = next(i for i, fr in enumerate(doc.frames) if fr[0] + fr[1] > start)
+        last = next(i for i in range(len(doc.frames) - 1, -1, -1) if doc.frames[i][0] < end)
+        data = self._read_frames(doc, first, last)
+        base = doc.frames[first][0]
+        return data[start - base : end - base].decode("utf-8", errors="ignore")
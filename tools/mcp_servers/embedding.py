@@ -0,0 +1,220 @@
+import os
+import re
+import math
+import time
+import asyncio
+import hashlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+# Embedding service shared by ingest.embed and query-time retrieval.
+#
+# Requests are queued per text and grouped into micro-batches (up to
+# EMBED_MAX_BATCH texts or EMBED_MAX_WAIT_MS of waiting). Each batch runs in a
+# process-pool worker that writes float32 vectors straight into a shared-memory
+# block allocated by the caller, so results never get pickled back through the
+# pool. Callers receive memoryview rows over that block.
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+@dataclass(frozen=True)
+class HashingEmbedder:
+    # Deterministic, CPU-only feature-hashing embedder (unigrams + bigrams), L2-normalized.
+    dim: int = 384
+
+    def embed_into(self, texts: List[str], out: memoryview) -> None:
+        for row, text in enumerate(texts):
+            vec = [0.0] * self.dim
+            tokens = _TOKEN_RE.findall(text.lower())
+            for feature in tokens + [a + " " + b for a, b in zip(tokens, tokens[1:])]:
+                h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+                vec[h % self.dim] += 1.0 if (h >> 63) & 1 else -1.0
+            norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+            out[row * self.dim : (row + 1) * self.dim] = array("f", (v / norm for v in vec))
+
+
+EMBEDDERS = {"hashing": HashingEmbedder}
+
+
+def embedder_from_env() -> HashingEmbedder:
+    name = os.getenv("EMBEDDER", "hashing")
+    if name not in EMBEDDERS:
+        raise ValueError(f"Unsupported EMBEDDER: {name}")
+    return EMBEDDERS[name](dim=int(os.getenv("EMBED_DIM", 384)))
+
+
+_worker_embedder: Optional[HashingEmbedder] = None
+
+
+def _init_worker(embedder: HashingEmbedder) -> None:
+    global _worker_embedder
+    _worker_embedder = embedder
+
+
+def _embed_batch(texts: List[str], shm_name: str) -> int:
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        out = shm.buf.cast("f")
+        try:
+            _worker_embedder.embed_into(texts, out)
+        finally:
+            out.release()
+    finally:
+        shm.close()
+    return len(texts)
+
+
+@dataclass
+class Embedding:
+    vector: memoryview  # float32 row, valid while this object (and its block) is alive
+    block: shared_memory.SharedMemory
+
+
+class EmbeddingService:
+    def __init__(
+        self,
+        embedder: Optional[HashingEmbedder] = None,
+        workers: Optional[int] = None,
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+    ) -> None:
+        self.embedder = embedder or embedder_from_env()
+        self.workers = workers or int(os.getenv("EMBED_WORKERS", os.cpu_count() or 1))
+        self.max_batch_size = max_batch_size or int(os.getenv("EMBED_MAX_BATCH", 64))
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else float(os.getenv("EMBED_MAX_WAIT_MS", 5))) / 1000
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._batch: List[Tuple[str, asyncio.Future]] = []  # taken off the queue, not yet dispatched
+        self._inflight: Optional[asyncio.Semaphore] = None
+        self._tasks: set = set()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(self.embedder,))
+
+    async def start(self) -> None:
+        self._pool = self._new_pool()
+        self._queue = asyncio.Queue()
+        # One batch per worker in flight; the queue keeps filling meanwhile.
+        self._inflight = asyncio.Semaphore(self.workers)
+        self._batcher = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._batcher:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+        # Texts that never reached a worker would otherwise wait forever.
+        pending, self._batch = self._batch, []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for _, fut in pending:
+            if not fut.done():
+                fut.set_exception(RuntimeError("EmbeddingService stopped"))
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._pool:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+        self._pool = self._queue = self._batcher = None
+
+    async def embed(self, texts: List[str]) -> List[Embedding]:
+        if self._queue is None:
+            raise RuntimeError("EmbeddingService not started")
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            fut = loop.create_future()
+            self._queue.put_nowait((text, fut))
+            futures.append(fut)
+        try:
+            return list(await asyncio.gather(*futures))
+        except BaseException:
+            # One text failed (or the caller went away): nobody will read the rest
+            for fut in futures:
+                fut.cancel()
+            raise
+
+    async def _next_batch(self) -> List[Tuple[str, asyncio.Future]]:
+        self._batch = batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            await self._inflight.acquire()
+            task = asyncio.create_task(self._dispatch(batch))
+            self._batch = []
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        texts = [text for text, _ in batch]
+        dim = self.embedder.dim
+        block: Optional[shared_memory.SharedMemory] = None
+        pool = self._pool
+        try:
+            # Inside the try: a failed allocation (e.g. /dev/shm full) must fail the batch too
+            block = shared_memory.SharedMemory(create=True, size=max(len(texts) * dim * 4, 1))
+            await asyncio.get_running_loop().run_in_executor(pool, _embed_batch, texts, block.name)
+        except BaseException as e:
+            if block is not None:
+                block.close()
+                block.unlink()
+            # The callers get the error; nobody awaits this task, so it is not re-raised.
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e if isinstance(e, Exception) else RuntimeError("embedding cancelled"))
+            if isinstance(e, BrokenProcessPool) and self._pool is pool:
+                # A worker died (e.g. OOM-killed); later batches get a fresh pool.
+                pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = self._new_pool()
+            return
+        finally:
+            self._inflight.release()
+        # The name is no longer needed once the worker is done; the mapping stays valid.
+        block.unlink()
+        rows = block.buf.cast("f")
+        delivered = False
+        for i, (_, fut) in enumerate(batch):
+            if not fut.done():
+                fut.set_result(Embedding(vector=rows[i * dim : (i + 1) * dim], block=block))
+                delivered = True
+        if not delivered:
+            # Every caller is gone; release the view first so the block can close.
+            rows.release()
+            block.close()
+
+
+def chunk_text(text: str, max_chars: Optional[int] = None) -> List[str]:
+    # Pack paragraphs into chunks of at most max_chars; oversized paragraphs are split hard.
+    max_chars = max_chars or int(os.getenv("EMBED_CHUNK_CHARS", 2000))
+    chunks: List[str] = []
+    current = ""
+    for para in (p.strip() for p in re.split(r"\n\s*\n", text)):
+        if not para:
+            continue
+        for start in range(0, len(para), max_chars):
+            piece = para[start : start + max_chars]
+            if current and len(current) + 2 + len(piece) > max_chars:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
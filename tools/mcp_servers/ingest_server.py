@@ -1,13 +1,24 @@
 import os
-from typing import Any, Dict
-from fastapi import FastAPI
+import base64
+import asyncio
+import binascii
+from dataclasses import asdict
+from typing import TYPE_CHECKING, Any, Dict
+from fastapi import FastAPI, Request
 from pydantic import BaseModel
 from .common import get_validator, maybe_inject_error
+from .uploads import UploadStore
+
+if TYPE_CHECKING:
+    from .embedding import EmbeddingService
 
 app = FastAPI(title="MCP - ingest.*")
 upload_validator = get_validator("ingest.upload.schema.json")
 extract_validator = get_validator("ingest.extract.schema.json")
 embed_validator = get_validator("ingest.embed.schema.json")
+# content_b64 is kept for small files only; larger files go through /uploads
+B64_MAX_CHARS = int(os.getenv("UPLOAD_B64_MAX_CHARS", 8 * 1024 * 1024))
+REAP_INTERVAL_SECS = 600
 
 
 class InvokeBody(BaseModel):
@@ -16,14 +27,52 @@ class InvokeBody(BaseModel):
     inject_error: str | None = None
 
 
+class CreateUploadBody(BaseModel):
+    filename: str
+    size: int | None = None
+
+
+async def reap_uploads(uploads: UploadStore) -> None:
+    # Abandoned partial uploads (no append for UPLOAD_TTL_SECS) and their in-memory state
+    while True:
+        await asyncio.sleep(REAP_INTERVAL_SECS)
+        try:
+            await uploads.reap()
+        except OSError:
+            pass  # retried on the next tick
+
+
+def store_b64(uploads: UploadStore, filename: str, content_b64: str) -> Dict[str, Any]:
+    return uploads.put_bytes(filename, base64.b64decode(content_b64, validate=True))
+
+
 @app.on_event("startup")
 async def on_startup():
+    app.state.uploads = UploadStore()
+    app.state.reaper = asyncio.create_task(reap_uploads(app.state.uploads))
+    app.state.embedding = None
+    app.state.embedding_lock = asyncio.Lock()
     app.state.ready = True
 
 
 @app.on_event("shutdown")
 async def on_shutdown():
     app.state.ready = False
+    app.state.reaper.cancel()
+    if app.state.embedding is not None:
+        await app.state.embedding.stop()
+
+
+async def get_embedding() -> "EmbeddingService":
+    # Started on the first ingest.embed: multiprocessing and the worker pool stay off the startup path
+    async with app.state.embedding_lock:
+        if app.state.embedding is None:
+            from .embedding import EmbeddingService
+
+            service = EmbeddingService()
+            await service.start()
+            app.state.embedding = service
+    return app.state.embedding
 
 
 @app.get("/health")
@@ -31,6 +80,28 @@ async def health():
     return {"ok": True, "stage": os.getenv("APP_STAGE", "local")}
 
 
+@app.post("/uploads")
+async def create_upload(body: CreateUploadBody):
+    return asdict(app.state.uploads.create(body.filename, body.size))
+
+
+@app.get("/uploads/{upload_id}")
+async def upload_status(upload_id: str):
+    return asdict(app.state.uploads.status(upload_id))
+
+
+@app.put("/uploads/{upload_id}")
+async def upload_chunk(upload_id: str, offset: int, request: Request):
+    # Raw (optionally chunked-encoded) body appended at `offset`; streamed to disk
+    state = await app.state.uploads.append(upload_id, offset, request.stream())
+    return asdict(state)
+
+
+@app.post("/uploads/{upload_id}/complete")
+async def complete_upload(upload_id: str):
+    return await app.state.uploads.complete(upload_id)
+
+
 @app.post("/invoke")
 async def invoke(body: InvokeBody):
     maybe_inject_error(body.inject_error)
@@ -38,7 +109,16 @@ async def invoke(body: InvokeBody):
         errors = sorted(upload_validator.iter_errors(body.input), key=lambda e: e.path)
         if errors:
             return {"error": "invalid_input", "details": [e.message for e in errors]}
-        return {"doc_id": "doc_stub"}
+        if len(body.input["content_b64"]) > B64_MAX_CHARS:
+            return {"error": "invalid_input", "details": ["content_b64 too large; use /uploads"]}
+        try:
+            # Decoding, hashing and writing up to UPLOAD_B64_MAX_CHARS stay off the event loop
+            stored = await asyncio.to_thread(
+                store_b64, app.state.uploads, body.input["filename"], body.input["content_b64"]
+            )
+        except binascii.Error as e:
+            return {"error": "invalid_input", "details": [f"content_b64: {e}"]}
+        return {**stored, "trace_id": body.input.get("trace_id"), "run_id": body.input.get("run_id")}
     if body.tool == "ingest.extract":
         errors = sorted(extract_validator.iter_errors(body.input), key=lambda e: e.path)
         if errors:
@@ -48,7 +128,11 @@ async def invoke(body: InvokeBody):
         errors = sorted(embed_validator.iter_errors(body.input), key=lambda e: e.path)
         if errors:
             return {"error": "invalid_input", "details": [e.message for e in errors]}
-        return {"ok": True, "vector_count": 10}
+        from .embedding import chunk_text
+
+        service = await get_embedding()
+        embeddings = await service.embed(chunk_text(body.input["text"]))
+        return {"ok": True, "vector_count": len(embeddings), "dim": service.embedder.dim}
     return {"error": "unknown_tool"}
 
 
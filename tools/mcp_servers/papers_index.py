@@ -0,0 +1,530 @@
+import os
+import re
+import sys
+import json
+import math
+import mmap
+import zlib
+import bisect
+import heapq
+import shutil
+import hashlib
+import argparse
+import threading
+import unicodedata
+from array import array
+from collections import Counter, deque
+from itertools import groupby
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Offline metadata index for papers.search, built from arXiv/Crossref JSONL dumps.
+#
+# Layout (all arrays native byte order, recorded in meta.json):
+# - <col>.dat / <col>.off   UTF-8 string column and uint64 offsets (count + 1)
+# - year.u16, source.u8     fixed-width columns
+# - tri.keys / tri.offs / tri.post
+#                           sorted crc32 trigram keys; uint64 posting offsets per
+#                           (trigram, length bucket); uint32 row ids, sorted per pair
+# - tri.fwd / tri.fwd_off   per-row sorted trigram keys (forward index) and uint64 offsets
+# - ids.keys / ids.rows / ids.runs
+#                           64-bit id hashes and row ids in sorted runs, uint64 run bounds
+#
+# Files are mmap-ed on first use; nothing is parsed up front.
+#
+# Rows are bucketed by title trigram count (bucket edges are in meta.json). The
+# build hands chunks of titles to a process pool; each worker writes a sorted
+# run, and the runs are merged by copying row-id segments per (trigram, bucket),
+# so memory is bounded by PAPERS_INDEX_BUILD_CHUNK_ROWS, not the corpus.
+#
+# Search visits buckets in order of their best possible trigram Jaccard score
+# and stops once the k-th best result cannot be beaten. In a bucket, a row must
+# share `need` of the n query trigrams to make the top k, so it appears in one
+# of the n - need + 1 rarest lists; only those are counted (Counter.update), and
+# the highest counts are scored exactly from the forward index. `need` rises
+# with the k-th best score. Postings counted and rows scored per query are
+# capped by PAPERS_INDEX_MAX_POSTINGS and PAPERS_INDEX_MAX_CANDIDATES.
+
+INDEX_VERSION = 1
+SOURCES = ["arxiv", "crossref", "semanticscholar"]
+STRING_COLUMNS = ["title", "authors", "category", "arxiv_id", "doi"]
+MAX_POSTINGS = int(os.getenv("PAPERS_INDEX_MAX_POSTINGS", 50000))
+MAX_CANDIDATES = int(os.getenv("PAPERS_INDEX_MAX_CANDIDATES", 500))
+BUILD_CHUNK_ROWS = int(os.getenv("PAPERS_INDEX_BUILD_CHUNK_ROWS", 250000))
+MIN_TRIGRAM_OVERLAP = 0.5
+
+_YEAR_RE = re.compile(r"\b(19|20)\d{2}\b")
+_ARXIV_ID_RE = re.compile(r"^(?:arxiv:)?(\d{4}\.\d{4,5}|[a-z\-]+(?:\.[a-z]{2})?/\d{7})(?:v\d+)?$", re.I)
+_DOI_RE = re.compile(r"^(?:doi:|https?://(?:dx\.)?doi\.org/)?(10\.\d{4,9}/\S+)$", re.I)
+
+
+def normalize_title(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c if c.isalnum() else " " for c in text if not unicodedata.combining(c))
+    return " ".join(text.split())
+
+
+def trigrams(text: str) -> List[int]:
+    padded = f"  {normalize_title(text)} "
+    return sorted({zlib.crc32(padded[i : i + 3].encode("utf-8")) for i in range(len(padded) - 2)})
+
+
+def id_key(kind: str, value: str) -> int:
+    digest = hashlib.blake2b(f"{kind}:{value.lower()}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def parse_id(query: str) -> Optional[int]:
+    query = query.strip()
+    m = _ARXIV_ID_RE.match(query.removeprefix("https://arxiv.org/abs/").removeprefix("https://arxiv.org/pdf/"))
+    if m:
+        return id_key("arxiv", m.group(1))
+    m = _DOI_RE.match(query)
+    if m:
+        return id_key("doi", m.group(1))
+    return None
+
+
+def _first_year(*values: Any) -> int:
+    for value in values:
+        m = _YEAR_RE.search(str(value or ""))
+        if m:
+            return int(m.group(0))
+    return 0
+
+
+def parse_arxiv(rec: Dict[str, Any]) -> Dict[str, Any]:
+    versions = rec.get("versions") or [{}]
+    return {
+        "title": " ".join((rec.get("title") or "").split()),
+        "authors": " ".join((rec.get("authors") or "").split()),
+        "year": _first_year(versions[0].get("created"), rec.get("update_date")),
+        "category": (rec.get("categories") or "").split(" ")[0],
+        "arxiv_id": rec.get("id") or "",
+        "doi": rec.get("doi") or "",
+        "source": "arxiv",
+    }
+
+
+def parse_crossref(rec: Dict[str, Any]) -> Dict[str, Any]:
+    titles = rec.get("title") or [""]
+    authors = [" ".join(p for p in (a.get("given"), a.get("family")) if p) for a in rec.get("author") or []]
+    date_parts = ((rec.get("issued") or {}).get("date-parts") or [[None]])[0]
+    return {
+        "title": " ".join((titles[0] if isinstance(titles, list) else titles).split()),
+        "authors": ", ".join(a for a in authors if a),
+        "year": _first_year(date_parts[0] if date_parts else None),
+        "category": (rec.get("subject") or [rec.get("type") or ""])[0],
+        "arxiv_id": "",
+        "doi": rec.get("DOI") or "",
+        "source": "crossref",
+    }
+
+
+PARSERS = {"arxiv": parse_arxiv, "crossref": parse_crossref}
+
+
+def iter_dump(paths: Iterable[str], source: str) -> Iterator[Dict[str, Any]]:
+    parse = PARSERS[source]
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    rec = parse(json.loads(line))
+                    if rec["title"]:
+                        yield rec
+
+
+def length_buckets() -> List[int]:
+    # Lower edges of the title trigram-count buckets: steps of 4 up to 32, then x1.25
+    edges = list(range(0, 32, 4))
+    edge = 32
+    while edge < 1024:
+        edges.append(edge)
+        edge = int(edge * 1.25)
+    return edges
+
+
+def _map_file(path: Path, fmt: str, maps: List[mmap.mmap]) -> memoryview:
+    with path.open("rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return memoryview(b"").cast(fmt)
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    maps.append(mm)
+    return memoryview(mm).cast(fmt)
+
+
+def _write_array(path: Path, values: array) -> None:
+    with path.open("wb") as f:
+        values.tofile(f)
+
+
+class _PostingsWriter:
+    # Appends row-id segments in (trigram, bucket) order to tri.keys / tri.offs / tri.post.
+    def __init__(self, out: Path, buckets: int) -> None:
+        self.out = out
+        self.buckets = buckets
+        self.keys, self.offs = array("I"), array("Q", [0])
+        self._post = (out / "tri.post").open("wb")
+
+    def _pad(self, length: int) -> None:
+        while len(self.offs) < length:
+            self.offs.append(self.offs[-1])
+
+    def add(self, tri: int, bucket: int, rows: Any) -> None:
+        if not self.keys or self.keys[-1] != tri:
+            self._pad(len(self.keys) * self.buckets + 1)
+            self.keys.append(tri)
+        end = (len(self.keys) - 1) * self.buckets + bucket + 1
+        self._pad(end)
+        if len(self.offs) == end:
+            self.offs.append(self.offs[-1])
+        self._post.write(rows)
+        self.offs[-1] += len(rows)
+
+    def close(self) -> None:
+        self._pad(len(self.keys) * self.buckets + 1)
+        self._post.close()
+        _write_array(self.out / "tri.keys", self.keys)
+        _write_array(self.out / "tri.offs", self.offs)
+
+
+def _build_run(titles: List[str], ids: List[Tuple[str, str]], base: int, run_dir: str, edges: List[int]) -> None:
+    # One chunk of rows [base, base + len(titles)) -> a self-contained sorted run.
+    out = Path(run_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    nb = len(edges)
+    postings: Dict[int, array] = {}
+    fwd, fwd_offs = array("I"), array("Q", [0])
+    for row, title in enumerate(titles, base):
+        row_tris = trigrams(title)
+        bucket = bisect.bisect_right(edges, len(row_tris)) - 1
+        for tri in row_tris:
+            key = tri * nb + bucket
+            plist = postings.get(key)
+            if plist is None:
+                postings[key] = plist = array("I")
+            plist.append(row)
+        fwd.extend(row_tris)
+        fwd_offs.append(len(fwd))
+    writer = _PostingsWriter(out, nb)
+    for key in sorted(postings):
+        writer.add(*divmod(key, nb), postings[key])
+    writer.close()
+    _write_array(out / "tri.fwd", fwd)
+    _write_array(out / "tri.fwd_off", fwd_offs)
+    id_pairs = []
+    for row, (arxiv_id, doi) in enumerate(ids, base):
+        if arxiv_id:
+            id_pairs.append((id_key("arxiv", arxiv_id), row))
+        if doi:
+            id_pairs.append((id_key("doi", doi), row))
+    id_pairs.sort()
+    _write_array(out / "ids.keys", array("Q", (k for k, _ in id_pairs)))
+    _write_array(out / "ids.rows", array("I", (r for _, r in id_pairs)))
+
+
+def _read_run(run_dir: Path, nb: int) -> Iterator[Tuple[int, List[int], memoryview]]:
+    # Streams a run as (trigram, bucket offsets, row ids) without mapping its postings.
+    keys = array("I")
+    keys.frombytes((run_dir / "tri.keys").read_bytes())
+    with (run_dir / "tri.offs").open("rb") as offs_file, (run_dir / "tri.post").open("rb") as post:
+        first = array("Q")
+        first.frombytes(offs_file.read(8))
+        start = first[0]
+        for tri in keys:
+            offs = array("Q")
+            offs.frombytes(offs_file.read(8 * nb))
+            bounds = [0] + [o - start for o in offs]
+            yield tri, bounds, memoryview(post.read(4 * bounds[-1])).cast("I")
+            start = offs[-1]
+
+
+def _merge_runs(out: Path, run_dirs: List[Path], nb: int) -> None:
+    writer = _PostingsWriter(out, nb)
+    # heapq.merge keeps run order for equal trigrams, and runs cover increasing
+    # row ranges, so concatenating per bucket keeps each segment sorted.
+    merged = heapq.merge(*(_read_run(d, nb) for d in run_dirs), key=lambda item: item[0])
+    for tri, group in groupby(merged, key=lambda item: item[0]):
+        present = [(bounds, rows) for _, bounds, rows in group]
+        for b in range(nb):
+            for bounds, rows in present:
+                if bounds[b + 1] > bounds[b]:
+                    writer.add(tri, b, rows[bounds[b] : bounds[b + 1]])
+    writer.close()
+    fwd_base = 0
+    id_runs = array("Q", [0])
+    with (out / "tri.fwd").open("wb") as fwd, (out / "tri.fwd_off").open("wb") as fwd_off, (
+        out / "ids.keys"
+    ).open("wb") as id_keys, (out / "ids.rows").open("wb") as id_rows:
+        array("Q", [0]).tofile(fwd_off)
+        for d in run_dirs:
+            for name, f in (("tri.fwd", fwd), ("ids.keys", id_keys), ("ids.rows", id_rows)):
+                with (d / name).open("rb") as src:
+                    shutil.copyfileobj(src, f)
+            offs = array("Q")
+            with (d / "tri.fwd_off").open("rb") as src:
+                offs.frombytes(src.read())
+            array("Q", (o + fwd_base for o in offs[1:])).tofile(fwd_off)
+            fwd_base += offs[-1]
+            id_runs.append(id_runs[-1] + (d / "ids.rows").stat().st_size // 4)
+    _write_array(out / "ids.runs", id_runs)
+
+
+def _chunks(records: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk: List[Dict[str, Any]] = []
+    for rec in records:
+        chunk.append(rec)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def build_index(
+    records: Iterable[Dict[str, Any]],
+    out_dir: str,
+    workers: Optional[int] = None,
+    chunk_rows: Optional[int] = None,
+) -> int:
+    out = Path(out_dir)
+    runs_dir = out / "runs"
+    shutil.rmtree(runs_dir, ignore_errors=True)
+    runs_dir.mkdir(parents=True)
+    workers = workers or int(os.getenv("PAPERS_INDEX_BUILD_WORKERS", os.cpu_count() or 1))
+    edges = length_buckets()
+    files = {name: (out / name).open("wb") for name in ("year.u16", "source.u8")}
+    for col in STRING_COLUMNS:
+        files[f"{col}.dat"] = (out / f"{col}.dat").open("wb")
+        files[f"{col}.off"] = (out / f"{col}.off").open("wb")
+        array("Q", [0]).tofile(files[f"{col}.off"])
+    ends = dict.fromkeys(STRING_COLUMNS, 0)
+    run_dirs: List[Path] = []
+    pool = None
+    pending: deque = deque()
+    row = 0
+    try:
+        for chunk in _chunks(records, chunk_rows or BUILD_CHUNK_ROWS):
+            for col in STRING_COLUMNS:
+                data, offsets = files[f"{col}.dat"], array("Q")
+                for rec in chunk:
+                    encoded = (rec.get(col) or "").encode("utf-8")
+                    data.write(encoded)
+                    ends[col] += len(encoded)
+                    offsets.append(ends[col])
+                offsets.tofile(files[f"{col}.off"])
+            array("H", (rec.get("year") or 0 for rec in chunk)).tofile(files["year.u16"])
+            array("B", (SOURCES.index(rec["source"]) for rec in chunk)).tofile(files["source.u8"])
+            run_dir = runs_dir / f"{len(run_dirs):05d}"
+            args = (
+                [rec["title"] for rec in chunk],
+                [(rec.get("arxiv_id") or "", rec.get("doi") or "") for rec in chunk],
+                row,
+                str(run_dir),
+                edges,
+            )
+            if workers > 1:
+                if pool is None:
+                    # Only the build needs a process pool; keep it out of the server's imports
+                    from concurrent.futures import ProcessPoolExecutor
+
+                    pool = ProcessPoolExecutor(max_workers=workers)
+                pending.append(pool.submit(_build_run, *args))
+                # Bound the chunks held in memory (queued for or inside workers)
+                while len(pending) > workers:
+                    pending.popleft().result()
+            else:
+                _build_run(*args)
+            run_dirs.append(run_dir)
+            row += len(chunk)
+        while pending:
+            pending.popleft().result()
+    finally:
+        for f in files.values():
+            f.close()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    _merge_runs(out, run_dirs, len(edges))
+    shutil.rmtree(runs_dir)
+    meta = {"version": INDEX_VERSION, "count": row, "byteorder": sys.byteorder, "length_buckets": edges}
+    (out / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+    return row
+
+
+class PapersIndex:
+    def __init__(self, index_dir: str) -> None:
+        self.index_dir = Path(index_dir)
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._maps: List[mmap.mmap] = []
+
+    def _map(self, name: str, fmt: str) -> memoryview:
+        return _map_file(self.index_dir / name, fmt, self._maps)
+
+    def _load(self) -> None:
+        with self._lock:
+            if self._loaded:
+                return
+            meta = json.loads((self.index_dir / "meta.json").read_text(encoding="utf-8"))
+            if meta.get("version") != INDEX_VERSION or meta.get("byteorder") != sys.byteorder:
+                raise ValueError(f"Incompatible papers index at {self.index_dir}")
+            self.count = meta["count"]
+            self._edges = meta["length_buckets"]
+            self._cols = {col: (self._map(f"{col}.dat", "B"), self._map(f"{col}.off", "Q")) for col in STRING_COLUMNS}
+            self._years = self._map("year.u16", "H")
+            self._sources = self._map("source.u8", "B")
+            self._tri_keys = self._map("tri.keys", "I")
+            self._tri_offs = self._map("tri.offs", "Q")
+            self._tri_post = self._map("tri.post", "I")
+            self._fwd = self._map("tri.fwd", "I")
+            self._fwd_offs = self._map("tri.fwd_off", "Q")
+            self._id_keys = self._map("ids.keys", "Q")
+            self._id_rows = self._map("ids.rows", "I")
+            self._id_runs = self._map("ids.runs", "Q")
+            self._loaded = True
+
+    def _str(self, col: str, row: int) -> str:
+        data, offs = self._cols[col]
+        return bytes(data[offs[row] : offs[row + 1]]).decode("utf-8")
+
+    def record(self, row: int, score: float = 1.0) -> Dict[str, Any]:
+        source = SOURCES[self._sources[row]]
+        arxiv_id, doi = self._str("arxiv_id", row), self._str("doi", row)
+        item: Dict[str, Any] = {
+            "title": self._str("title", row),
+            "authors": self._str("authors", row),
+            "category": self._str("category", row),
+            "source": source,
+            "score": round(score, 4),
+        }
+        if self._years[row]:
+            item["year"] = self._years[row]
+            item["published"] = str(self._years[row])
+        if arxiv_id:
+            item["arxiv_id"] = arxiv_id
+            item["url"] = f"https://arxiv.org/abs/{arxiv_id}"
+            item["pdf_url"] = f"https://arxiv.org/pdf/{arxiv_id}"
+        if doi:
+            item["doi"] = doi
+            item.setdefault("url", f"https://doi.org/{doi}")
+        return item
+
+    def lookup_id(self, query: str) -> List[int]:
+        self._load()
+        key = parse_id(query)
+        if key is None:
+            return []
+        rows = []
+        runs = self._id_runs
+        for j in range(len(runs) - 1):
+            i = bisect.bisect_left(self._id_keys, key, runs[j], runs[j + 1])
+            while i < runs[j + 1] and self._id_keys[i] == key:
+                rows.append(self._id_rows[i])
+                i += 1
+        return rows
+
+    def _bucket_order(self, n: int, required: int) -> List[Tuple[float, int, int]]:
+        # (best possible Jaccard, bucket, smallest trigram count) per bucket, best first
+        order = []
+        for b, lo in enumerate(self._edges):
+            hi = self._edges[b + 1] - 1 if b + 1 < len(self._edges) else None
+            if hi is not None and hi < required:
+                continue
+            if hi is not None and hi < n:
+                bound = hi / n
+            elif lo > n:
+                bound = n / lo
+            else:
+                bound = 1.0
+            order.append((bound, b, lo))
+        order.sort(key=lambda x: -x[0])
+        return order
+
+    def _top_counted(self, counts: Counter, limit: int, n: int) -> List[int]:
+        # Rows with the highest counts, up to limit, chosen by a count threshold
+        # (counts are small integers); ties go to titles closest to the query's length.
+        if len(counts) <= limit:
+            return list(counts)
+        hist = Counter(counts.values())
+        levels = sorted(hist, reverse=True)
+        threshold, total = levels[0], 0
+        for level in levels:
+            if total + hist[level] > limit:
+                break
+            total += hist[level]
+            threshold = level
+        rows = [r for r, c in counts.items() if c >= threshold]
+        if len(rows) > limit:
+            offs = self._fwd_offs
+            rows = heapq.nsmallest(limit, rows, key=lambda r: abs(offs[r + 1] - offs[r] - n))
+        return rows
+
+    def search(self, query: str, max_results: int = 10, sources: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        self._load()
+        allowed = {SOURCES.index(s) for s in sources} if sources else None
+        rows = [r for r in self.lookup_id(query) if allowed is None or self._sources[r] in allowed]
+        if rows:
+            return [self.record(r) for r in rows[:max_results]]
+        q_tris = trigrams(query)
+        if not q_tris or max_results <= 0:
+            return []
+        q_set = set(q_tris)
+        n = len(q_tris)
+        required = max(1, int(n * MIN_TRIGRAM_OVERLAP + 0.5))
+        nb = len(self._edges)
+        keys, offs, post = self._tri_keys, self._tri_offs, self._tri_post
+        fwd, fwd_offs = self._fwd, self._fwd_offs
+        bases = []
+        for tri in q_tris:
+            i = bisect.bisect_left(keys, tri)
+            if i < len(keys) and keys[i] == tri:
+                bases.append(i * nb)
+        missing = n - len(bases)
+        top: List[Tuple[float, int]] = []  # min-heap of (score, -row): the current worst on top
+        postings_left, candidates_left = MAX_POSTINGS, MAX_CANDIDATES
+        for bound, b, lo in self._bucket_order(n, required):
+            kth = top[0][0] if len(top) == max_results else 0.0
+            if bound < kth or postings_left <= 0 or candidates_left <= 0:
+                break
+            # Rows here have at least lo trigrams, so reaching kth needs shared >= need
+            need = max(required, math.ceil(kth * (n + lo) / (1 + kth) - 1e-9))
+            lists = n - need + 1 - missing
+            if lists <= 0:
+                continue
+            slices = sorted(((offs[i + b], offs[i + b + 1]) for i in bases), key=lambda s: s[1] - s[0])
+            counts: Counter = Counter()
+            for start, end in slices[:lists]:
+                end = min(end, start + postings_left)
+                counts.update(post[start:end].tolist())
+                postings_left -= end - start
+            candidates = self._top_counted(counts, candidates_left, n)
+            candidates_left -= len(candidates)
+            for r in candidates:
+                if allowed is not None and self._sources[r] not in allowed:
+                    continue
+                a, c = fwd_offs[r], fwd_offs[r + 1]
+                shared = len(q_set.intersection(fwd[a:c]))
+                if shared >= required:
+                    item = (shared / (n + (c - a) - shared), -r)
+                    if len(top) < max_results:
+                        heapq.heappush(top, item)
+                    elif item > top[0]:
+                        heapq.heapreplace(top, item)
+        return [self.record(-neg_row, score) for score, neg_row in sorted(top, reverse=True)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build the offline papers.search metadata index")
+    parser.add_argument("--source", choices=sorted(PARSERS), required=True)
+    parser.add_argument("--out", default=os.getenv("PAPERS_INDEX_DIR", "./papers_index"))
+    parser.add_argument("--workers", type=int, help="build processes (default PAPERS_INDEX_BUILD_WORKERS or CPU count)")
+    parser.add_argument("dumps", nargs="+", help="JSONL metadata dumps")
+    args = parser.parse_args()
+    count = build_index(iter_dump(args.dumps, args.source), args.out, workers=args.workers)
+    print(f"[OK]   indexed {count} records into {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,14 @@
 import os
-from typing import Any, Dict
+import asyncio
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 from fastapi import FastAPI
 from pydantic import BaseModel
 from .common import get_validator, maybe_inject_error
 
+if TYPE_CHECKING:
+    from .doc_cache import CachedDocument, DocCache
+    from .papers_index import PapersIndex
+
 app = FastAPI(title="MCP - papers.*")
 search_validator = get_validator("papers.search.schema.json")
 fetch_validator = get_validator("papers.fetch.schema.json")
@@ -17,12 +22,77 @@ class InvokeBody(BaseModel):
 
 @app.on_event("startup")
 async def on_startup():
+    app.state.doc_cache = None
+    app.state.papers_index = None
     app.state.ready = True
 
 
 @app.on_event("shutdown")
 async def on_shutdown():
     app.state.ready = False
+    if app.state.doc_cache is not None:
+        app.state.doc_cache.close()
+
+
+def get_doc_cache() -> "DocCache":
+    # Opened on the first papers.fetch, keeping sqlite3/zlib/mmap off the startup path
+    if app.state.doc_cache is None:
+        from .doc_cache import DocCache
+
+        app.state.doc_cache = DocCache()
+    return app.state.doc_cache
+
+
+def get_papers_index() -> Optional["PapersIndex"]:
+    # Created on the first papers.search; its files are mmap-ed on first use as well
+    if app.state.papers_index is None and os.getenv("PAPERS_INDEX_DIR"):
+        from .papers_index import PapersIndex
+
+        app.state.papers_index = PapersIndex(os.environ["PAPERS_INDEX_DIR"])
+    return app.state.papers_index
+
+
+def fetch_document(pdf_url: str) -> Tuple[List[str], Dict[str, Any]]:
+    # Stub fetcher: returns per-page text and extracted metadata
+    return ["stub text"], {}
+
+
+def serve_fetch(cache: "DocCache", params: Dict[str, Any]) -> Dict[str, Any]:
+    key = params.get("doc_id") or params["pdf_url"]
+    doc = cache.get(key)
+    cached = doc is not None
+    if doc is None:
+        pages, metadata = fetch_document(params["pdf_url"])
+        doc = cache.put(key, pages, metadata)
+    try:
+        return read_document(cache, doc, params, cached)
+    finally:
+        doc.close()
+
+
+def read_document(cache: "DocCache", doc: "CachedDocument", params: Dict[str, Any], cached: bool) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    if "pages" in params:
+        page_range = params["pages"]
+        out["text"] = cache.read_pages(doc, page_range.get("start", 1), page_range.get("end"))
+        out["range"] = {"pages": page_range}
+    elif "byte_range" in params:
+        byte_range = params["byte_range"]
+        out["text"] = cache.read_bytes(doc, byte_range.get("start", 0), byte_range.get("end"))
+        out["range"] = {"byte_range": byte_range}
+    else:
+        out["text"] = cache.read_pages(doc)
+    out.update(
+        {
+            "metadata": {**doc.metadata, "pages": doc.pages, "size_bytes": doc.raw_size},
+            "doc_id": params.get("doc_id"),
+            "content_hash": doc.content_hash,
+            "cached": cached,
+            "trace_id": params.get("trace_id"),
+            "run_id": params.get("run_id"),
+        }
+    )
+    return out
 
 
 @app.get("/health")
@@ -37,13 +107,20 @@ async def invoke(body: InvokeBody):
         errors = sorted(search_validator.iter_errors(body.input), key=lambda e: e.path)
         if errors:
             return {"error": "invalid_input", "details": [e.message for e in errors]}
-        items = [{"title": "stub", "url": "https://example.com", "source": "arxiv"}]
+        papers_index = get_papers_index()
+        if papers_index is None:
+            items = [{"title": "stub", "url": "https://example.com", "source": "arxiv"}]
+        else:
+            items = await asyncio.to_thread(
+                papers_index.search, body.input["query"], body.input.get("max_results", 10), body.input.get("sources")
+            )
         return {"items": items, "trace_id": body.input.get("trace_id"), "run_id": body.input.get("run_id")}
     if body.tool == "papers.fetch":
         errors = sorted(fetch_validator.iter_errors(body.input), key=lambda e: e.path)
         if errors:
             return {"error": "invalid_input", "details": [e.message for e in errors]}
-        return {"text": "stub text", "metadata": {"pages": 1}, "doc_id": body.input.get("doc_id")}
+        # sqlite, zlib and blob I/O stay off the event loop
+        return await asyncio.to_thread(serve_fetch, get_doc_cache(), body.input)
     return {"error": "unknown_tool"}
 
 
@@ -0,0 +1,196 @@
+import os
+import re
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+# Resumable binary uploads for ingest.upload.
+#
+# An upload is a partial file under <UPLOAD_DIR>/partial/<upload_id> plus a JSON
+# sidecar. Chunks are streamed straight to disk at the client-supplied offset,
+# which must equal the current size (the source of truth after a restart).
+# A running sha256 is kept per upload; if it is lost (restart) it is rebuilt by
+# re-reading the partial file. On completion the file is moved into a
+# content-addressed store, so identical documents share one doc_id.
+# Uploads with nothing appended for UPLOAD_TTL_SECS are reaped by reap().
+
+READ_SIZE = 1024 * 1024
+_UPLOAD_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+@dataclass
+class UploadState:
+    upload_id: str
+    filename: str
+    offset: int
+    size: Optional[int] = None
+
+
+def doc_id_for(digest: str) -> str:
+    return f"doc_{digest[:16]}"
+
+
+class UploadStore:
+    def __init__(
+        self, root: Optional[str] = None, max_bytes: Optional[int] = None, ttl: Optional[float] = None
+    ) -> None:
+        self.root = Path(root or os.getenv("UPLOAD_DIR", "./uploads")).resolve()
+        self.max_bytes = int(max_bytes if max_bytes is not None else os.getenv("UPLOAD_MAX_BYTES", 200 * 1024**2))
+        self.ttl = float(ttl if ttl is not None else os.getenv("UPLOAD_TTL_SECS", 24 * 3600))
+        self._partial = self.root / "partial"
+        self._docs = self.root / "docs"
+        self._partial.mkdir(parents=True, exist_ok=True)
+        self._docs.mkdir(parents=True, exist_ok=True)
+        self._hashers: Dict[str, Any] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _paths(self, upload_id: str) -> Tuple[Path, Path]:
+        if not _UPLOAD_ID_RE.match(upload_id):
+            raise HTTPException(status_code=404, detail=f"unknown upload: {upload_id}")
+        return self._partial / upload_id, self._partial / f"{upload_id}.json"
+
+    def _load(self, upload_id: str) -> UploadState:
+        data_path, meta_path = self._paths(upload_id)
+        if not meta_path.exists():
+            raise HTTPException(status_code=404, detail=f"unknown upload: {upload_id}")
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        return UploadState(
+            upload_id=upload_id, filename=meta["filename"], offset=data_path.stat().st_size, size=meta.get("size")
+        )
+
+    def _hasher(self, state: UploadState) -> Any:
+        h = self._hashers.get(state.upload_id)
+        if h is None:
+            h = hashlib.sha256()
+            with self._paths(state.upload_id)[0].open("rb") as f:
+                while chunk := f.read(READ_SIZE):
+                    h.update(chunk)
+            self._hashers[state.upload_id] = h
+        return h
+
+    def create(self, filename: str, size: Optional[int] = None) -> UploadState:
+        if size is not None and size > self.max_bytes:
+            raise HTTPException(status_code=413, detail=f"upload exceeds {self.max_bytes} bytes")
+        upload_id = uuid.uuid4().hex
+        data_path, meta_path = self._paths(upload_id)
+        data_path.touch()
+        meta_path.write_text(json.dumps({"filename": filename, "size": size}), encoding="utf-8")
+        self._hashers[upload_id] = hashlib.sha256()
+        return UploadState(upload_id=upload_id, filename=filename, offset=0, size=size)
+
+    def status(self, upload_id: str) -> UploadState:
+        return self._load(upload_id)
+
+    def _lock(self, upload_id: str) -> asyncio.Lock:
+        # Validate first so unknown ids never get a lock entry.
+        self._load(upload_id)
+        return self._locks.setdefault(upload_id, asyncio.Lock())
+
+    def _load_locked(self, upload_id: str) -> UploadState:
+        # Caller holds the upload's lock; the upload may have completed while it waited.
+        try:
+            return self._load(upload_id)
+        except HTTPException:
+            self._locks.pop(upload_id, None)
+            raise
+
+    @staticmethod
+    def _write(f: Any, hasher: Any, chunk: bytes) -> None:
+        f.write(chunk)
+        hasher.update(chunk)
+
+    async def append(self, upload_id: str, offset: int, chunks: AsyncIterator[bytes]) -> UploadState:
+        async with self._lock(upload_id):
+            state = self._load_locked(upload_id)
+            if offset != state.offset:
+                raise HTTPException(status_code=409, detail={"error": "offset_mismatch", "offset": state.offset})
+            limit = min(self.max_bytes, state.size) if state.size is not None else self.max_bytes
+            # Re-hashing after a restart reads the whole partial file; keep it and the writes off the loop.
+            hasher = await asyncio.to_thread(self._hasher, state)
+            f = await asyncio.to_thread(self._paths(upload_id)[0].open, "ab")
+            try:
+                async for chunk in chunks:
+                    if state.offset + len(chunk) > limit:
+                        raise HTTPException(status_code=413, detail=f"upload exceeds {limit} bytes")
+                    await asyncio.to_thread(self._write, f, hasher, chunk)
+                    state.offset += len(chunk)
+            finally:
+                await asyncio.to_thread(f.close)
+            return state
+
+    async def complete(self, upload_id: str) -> Dict[str, Any]:
+        async with self._lock(upload_id):
+            state = self._load_locked(upload_id)
+            if state.size is not None and state.offset != state.size:
+                raise HTTPException(
+                    status_code=409, detail={"error": "incomplete_upload", "offset": state.offset, "size": state.size}
+                )
+            digest = (await asyncio.to_thread(self._hasher, state)).hexdigest()
+            data_path, meta_path = self._paths(upload_id)
+            deduplicated = await asyncio.to_thread(self._store, digest, state.filename, data_path)
+            meta_path.unlink(missing_ok=True)
+            self._hashers.pop(upload_id, None)
+            self._locks.pop(upload_id, None)
+        return {"doc_id": doc_id_for(digest), "sha256": digest, "size": state.offset, "deduplicated": deduplicated}
+
+    def put_bytes(self, filename: str, data: bytes) -> Dict[str, Any]:
+        if len(data) > self.max_bytes:
+            raise HTTPException(status_code=413, detail=f"upload exceeds {self.max_bytes} bytes")
+        digest = hashlib.sha256(data).hexdigest()
+        tmp = self._partial / f"{uuid.uuid4().hex}.b64"
+        if not (self._docs / digest).exists():
+            tmp.write_bytes(data)
+        deduplicated = self._store(digest, filename, tmp)
+        return {"doc_id": doc_id_for(digest), "sha256": digest, "size": len(data), "deduplicated": deduplicated}
+
+    def _expired(self) -> List[str]:
+        # Stray put_bytes temp files go right away; partial uploads are re-checked on the loop.
+        cutoff = time.time() - self.ttl
+        expired = []
+        for path in self._partial.iterdir():
+            try:
+                if path.stat().st_mtime >= cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+            if path.suffix == ".b64":
+                path.unlink(missing_ok=True)
+            elif _UPLOAD_ID_RE.match(path.name):
+                expired.append(path.name)
+        return expired
+
+    async def reap(self) -> List[str]:
+        reaped = []
+        for upload_id in await asyncio.to_thread(self._expired):
+            lock = self._locks.get(upload_id)
+            if lock is not None and lock.locked():
+                continue
+            data_path, meta_path = self._paths(upload_id)
+            try:
+                # An append may have landed since the scan; no await between this check and the unlink
+                if data_path.stat().st_mtime >= time.time() - self.ttl:
+                    continue
+            except FileNotFoundError:
+                pass
+            meta_path.unlink(missing_ok=True)
+            data_path.unlink(missing_ok=True)
+            self._hashers.pop(upload_id, None)
+            self._locks.pop(upload_id, None)
+            reaped.append(upload_id)
+        return reaped
+
+    def _store(self, digest: str, filename: str, src: Path) -> bool:
+        dest = self._docs / digest
+        if dest.exists():
+            src.unlink(missing_ok=True)
+            return True
+        os.replace(src, dest)
+        (self._docs / f"{digest}.json").write_text(json.dumps({"filename": filename}), encoding="utf-8")
+        return False